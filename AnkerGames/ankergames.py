@@ -1,18 +1,39 @@
 import asyncio
 import json
+import os
 import re
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
-from typing import List, Optional, Tuple
+from typing import List, Optional
 
-from playwright.async_api import async_playwright, Browser, Page
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+try:
+    import orjson
+except ImportError:
+    # Fallback на стандартный json, если orjson не установлен
+    orjson = None
 
 
 BASE_URL = "https://ankergames.net"
 GAMES_LIST_URL = f"{BASE_URL}/games-list"
+GAME_ANCHOR_SELECTOR = 'div.grid a[href*="/game/"]'
+
+_DATE_RE = re.compile(r"([A-Za-z]{3,9} \d{1,2}, \d{4} at \d{1,2}:\d{2} (AM|PM))")
+_LAST_UPDATED_RE = re.compile(r"last\s*updated[^\d]*(\d+)\s+month", re.IGNORECASE)
+_PUBLISHED_RE = re.compile(r"published\s*on[^\d]*(\d+)\s+month", re.IGNORECASE)
+
+# Resource types the scraper never reads. Stylesheets stay enabled: the modal
+# visibility checks and innerText depend on the page layout.
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+# Hard limit for one game page and the number of retries after it is hit
+GAME_TIMEOUT_S = 45
+GAME_RETRIES = 1
 
 
-@dataclass
+@dataclass(slots=True)
 class DownloadItem:
     title: str
     uris: List[str]
@@ -32,7 +53,7 @@ def to_iso_utc(dt: datetime) -> str:
 def parse_last_updated(text: str) -> Optional[str]:
     # Expect formats like: "Last updated Apr 18, 2025 at 07:20 AM"
     # Extract the date-time segment and parse
-    match = re.search(r"([A-Za-z]{3,9} \d{1,2}, \d{4} at \d{1,2}:\d{2} (AM|PM))", text)
+    match = _DATE_RE.search(text)
     if not match:
         return None
     dt_str = match.group(1)
@@ -45,310 +66,415 @@ def parse_last_updated(text: str) -> Optional[str]:
     return None
 
 
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
 def _days_in_month(year: int, month: int) -> int:
-    if month == 12:
-        next_month = datetime(year + 1, 1, 1, tzinfo=timezone.utc)
-    else:
-        next_month = datetime(year, month + 1, 1, tzinfo=timezone.utc)
-    this_month = datetime(year, month, 1, tzinfo=timezone.utc)
-    return (next_month - this_month).days
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return _DAYS_IN_MONTH[month - 1]
 
 
-def subtract_months(dt: datetime, months: int) -> datetime:
-    year = dt.year
-    month = dt.month
-    day = dt.day
-    month_index = (year * 12 + (month - 1)) - months
-    new_year = month_index // 12
-    new_month = month_index % 12 + 1
-    max_day = _days_in_month(new_year, new_month)
-    new_day = min(day, max_day)
-    return dt.replace(year=new_year, month=new_month, day=new_day)
+def _iso_months_ago(now: datetime, months: int) -> str:
+    # `now` is expected in UTC; the day is clamped to the length of the target month
+    month_index = now.year * 12 + now.month - 1 - months
+    year, month = divmod(month_index, 12)
+    month += 1
+    day = min(now.day, _days_in_month(year, month))
+    return f"{year:04d}-{month:02d}-{day:02d}T{now.hour:02d}:{now.minute:02d}:{now.second:02d}.000Z"
 
 
-def parse_relative_months(text: str) -> Optional[str]:
+def parse_relative_months(text: str, now: Optional[datetime] = None) -> Optional[str]:
     # Examples inside a block:
     # "Last Updated - 6 months ago"
     # "Published on, 10 months ago"
-    lowered = text.lower()
-    now = datetime.now(timezone.utc)
+    if now is None:
+        now = datetime.now(timezone.utc)
 
     # Prefer Last Updated
-    m = re.search(r"last\s*updated[^\d]*(\d+)\s+month", lowered)
+    m = _LAST_UPDATED_RE.search(text)
     if m:
-        months = int(m.group(1))
-        dt = subtract_months(now, months)
-        return to_iso_utc(dt)
+        return _iso_months_ago(now, int(m.group(1)))
 
     # Fallback to Published on
-    m = re.search(r"published\s*on[^\d]*(\d+)\s+month", lowered)
+    m = _PUBLISHED_RE.search(text)
     if m:
-        months = int(m.group(1))
-        dt = subtract_months(now, months)
-        return to_iso_utc(dt)
+        return _iso_months_ago(now, int(m.group(1)))
 
     return None
 
 
-async def safe_inner_text(el) -> Optional[str]:
-    try:
-        txt = await el.inner_text()
-        return txt.strip()
-    except Exception:
-        return None
+def dump_item(item: DownloadItem) -> str:
+    data = asdict(item)
+    if orjson is not None:
+        return orjson.dumps(data).decode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+async def block_resources(route) -> None:
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def wait_for_stable_count(
+    page: Page,
+    selector: str,
+    interval_ms: int = 250,
+    stable_checks: int = 2,
+    timeout_ms: int = 15000,
+) -> int:
+    # Poll the number of matched elements until it stays unchanged for `stable_checks` polls in a row
+    count_js = "(sel) => document.querySelectorAll(sel).length"
+    prev = await page.evaluate(count_js, selector)
+    stable = 0
+    waited = 0
+    while stable < stable_checks and waited < timeout_ms:
+        await page.wait_for_timeout(interval_ms)
+        waited += interval_ms
+        count = await page.evaluate(count_js, selector)
+        stable = stable + 1 if count == prev else 0
+        prev = count
+    return prev
+
+
+# True once the grid has more cards than before the click, or the "Load All Games" button is gone
+LOAD_ALL_DONE_JS = """([sel, before]) =>
+    document.querySelectorAll(sel).length > before
+    || !Array.from(document.querySelectorAll("button")).some((b) => b.textContent.includes("Load All Games"))
+"""
 
 
 async def get_game_links(page: Page) -> List[str]:
     await page.goto(GAMES_LIST_URL, wait_until="domcontentloaded")
 
+    # The grid contains many cards; get all anchors that point to /game/...
+    anchors = page.locator(GAME_ANCHOR_SELECTOR)
+
     # Try to click "Load All Games" if present
     try:
         load_all_button = page.locator('button:has-text("Load All Games")')
         if await load_all_button.count() > 0:
+            await anchors.first.wait_for(timeout=15000)
+            before = await anchors.count()
             await load_all_button.first.click()
-            # Give the Livewire/Alpine stack time to populate
-            await page.wait_for_timeout(2000)
-            # Wait for network to settle a bit
-            with page.expect_network_idle(timeout=15000):
-                await page.wait_for_timeout(1000)
+            # The Livewire response may take a while: first wait for the grid to grow,
+            # otherwise the stable-count check would return the pre-click count
+            try:
+                await page.wait_for_function(LOAD_ALL_DONE_JS, arg=[GAME_ANCHOR_SELECTOR, before], timeout=15000)
+            except Exception:
+                print("Load All Games: no new cards after 15s, using the cards already loaded")
+            # Livewire/Alpine appends cards in batches: wait until the count stops growing
+            await wait_for_stable_count(page, GAME_ANCHOR_SELECTOR)
     except Exception:
         # Continue even if the button is missing
         pass
 
-    # The grid contains many cards; get all anchors that point to /game/...
-    anchors = page.locator('div.grid a[href*="/game/"]')
-    count = await anchors.count()
+    # Collect all hrefs in a single round-trip instead of one IPC per anchor
+    hrefs = await page.eval_on_selector_all(
+        GAME_ANCHOR_SELECTOR,
+        "els => Array.from(new Set(els.map(e => e.getAttribute('href')).filter(Boolean)))",
+    )
     links = []
-    for i in range(count):
-        href = await anchors.nth(i).get_attribute("href")
-        if not href:
-            continue
+    seen = set()
+    for href in hrefs:
         if href.startswith("/"):
             href = BASE_URL + href
-        if href.startswith(f"{BASE_URL}/game/") and href not in links:
+        if href.startswith(f"{BASE_URL}/game/") and href not in seen:
+            seen.add(href)
             links.append(href)
     return links
 
 
-async def extract_title(page: Page) -> str:
-    # Part 1: Main title from h1
-    title_part_1 = None
-    h1 = page.locator("h1")
-    if await h1.count() > 0:
-        title_part_1 = (await safe_inner_text(h1.first)) or None
-
-    # Part 2: Version badge, supports "V 1.5.0", "v1.0.13", "v 1.0.13"
-    version_part = None
-    version_pattern = re.compile(r"(?i)^v\s*\d+(?:[._]\d+)*")
-    # Prefer animate-glow span
-    version_locator = page.locator('span.animate-glow')
-    if await version_locator.count() > 0:
-        version_text = (await safe_inner_text(version_locator.first)) or ""
-        version_text = re.sub(r"\s+", " ", version_text).strip()
-        if version_text and (version_pattern.search(version_text) or version_text.upper().startswith("V ")):
-            version_part = version_text
-    if not version_part:
-        # Fallback: scan spans for version-like text
-        spans = page.locator('span')
-        span_count = await spans.count()
-        for i in range(min(span_count, 200)):
-            t = (await safe_inner_text(spans.nth(i))) or ""
-            t = t.strip()
-            if not t:
-                continue
-            if version_pattern.search(t) or t.upper().startswith("V "):
-                version_part = t
-                break
-
-    # Part 3: Edition value (e.g., "Multiplayer" or "Complete"). If present, append literal "Edition".
-    part3_text = None
+# Runs in the browser and returns everything scrape_game needs in a single round-trip
+PAGE_INFO_JS = """() => {
+    const norm = (t) => (t || "").replace(/\\s+/g, " ").trim();
+    const versionRe = /^v\\s*\\d+(?:[._]\\d+)*/i;
+    const isVersion = (t) => versionRe.test(t) || t.toUpperCase().startsWith("V ");
+    const spans = Array.from(document.querySelectorAll("span"));
+
+    // Part 1: Main title from h1
+    const h1 = document.querySelector("h1");
+    const title = h1 ? norm(h1.innerText) : null;
+
+    // Part 2: Version badge, supports "V 1.5.0", "v1.0.13", "v 1.0.13"
+    let version = null;
+    const glow = document.querySelector("span.animate-glow");
+    if (glow) {
+        const t = norm(glow.innerText);
+        if (t && isVersion(t)) version = t;
+    }
+    if (!version) {
+        for (const s of spans.slice(0, 200)) {
+            const t = (s.innerText || "").trim();
+            if (t && isVersion(t)) { version = t; break; }
+        }
+    }
+
+    // Part 3: Edition value, i.e. the span preceding the "Edition" label, or a "Complete" span
+    let edition = null;
+    const label = spans.find((s) => /edition/i.test(s.textContent || ""));
+    if (label) {
+        let prev = label.previousElementSibling;
+        while (prev && prev.tagName !== "SPAN") prev = prev.previousElementSibling;
+        if (prev) edition = norm(prev.innerText) || null;
+    }
+    if (!edition) {
+        const complete = spans.find((s) => /complete/i.test(s.textContent || ""));
+        if (complete) edition = norm(complete.innerText) || null;
+    }
+
+    // Size like "40.0 GB" / "755.6 MB" and "Last Updated - X months ago" / "Published on, Y months ago"
+    const text = document.body ? document.body.innerText : "";
+    const size = text.match(/(\\d+(?:\\.\\d+)?)\\s*(GB|MB)/);
+    const date = text.match(/last\\s*updated[^\\d]*\\d+\\s+month/i)
+        || text.match(/published\\s*on[^\\d]*\\d+\\s+month/i);
+
+    return {
+        title: title,
+        version: version,
+        edition: edition,
+        fileSize: size ? size[1] + " " + size[2] : null,
+        dateText: date ? date[0] : null,
+    };
+}"""
+
+
+async def extract_page_info(page: Page) -> dict:
     try:
-        edition_label = page.locator('span:has-text("Edition")')
-        if await edition_label.count() > 0:
-            value_span = edition_label.first.locator('xpath=preceding-sibling::span[1]')
-            if await value_span.count() > 0:
-                part3_text = (await safe_inner_text(value_span.first)) or None
+        return await page.evaluate(PAGE_INFO_JS) or {}
     except Exception:
-        pass
-    if not part3_text:
-        part3_locator = page.locator('span:has-text("Complete")')
-        if await part3_locator.count() > 0:
-            part3_text = (await safe_inner_text(part3_locator.first)) or None
-
-    # If part3 exists, add literal "Edition"
-    parts = [p for p in [title_part_1, version_part, part3_text] if p]
-    if part3_text:
+        return {}
+
+
+def build_title(info: dict) -> str:
+    # Title + version + edition value; if edition exists, add literal "Edition"
+    edition = info.get("edition")
+    parts = [p for p in [info.get("title"), info.get("version"), edition] if p]
+    if edition:
         parts.append("Edition")
+    return " ".join(parts)
 
-    return " ".join(parts) if parts else (title_part_1 or "")
 
+async def read_download_href(final_anchor) -> Optional[str]:
+    href = await final_anchor.first.get_attribute("href")
+    if href:
+        # Normalize whitespace/newlines
+        href = "".join(href.split())
+    return href or None
 
-async def extract_file_size(page: Page) -> Optional[str]:
-    # Look for text like "40.0 GB" or "755.6 MB"
-    # Try a few likely containers first to avoid false positives
-    candidates = [
-        page.locator('div:has(.text-xs):has-text("GB"), div:has(.text-xs):has-text("MB")'),
-        page.locator('div:has-text("GB"), div:has-text("MB")'),
-        page.locator('span:has-text("GB"), span:has-text("MB")'),
-    ]
-    pattern = re.compile(r"(\d+(?:\.\d+)?)\s*(GB|MB)")
-    for loc in candidates:
-        try:
-            count = await loc.count()
-            for i in range(min(count, 10)):
-                txt = await safe_inner_text(loc.nth(i))
-                if not txt:
-                    continue
-                match = pattern.search(txt)
-                if match:
-                    return f"{match.group(1)} {match.group(2)}"
-        except Exception:
-            continue
-    # Fallback: page-wide search
+
+async def extract_download_link(page: Page) -> Optional[str]:
+    final_anchor = page.locator('a:has-text("Download Now")')
+    generate_button = page.locator('a.download-button:has-text("Download")')
+
+    # The final "Download Now" anchor may already be on the page: skip the modal entirely
     try:
-        content = await page.content()
-        match = pattern.search(content)
-        if match:
-            return f"{match.group(1)} {match.group(2)}"
+        if await final_anchor.count() > 0 and await final_anchor.first.is_visible():
+            return await read_download_href(final_anchor)
     except Exception:
         pass
-    return None
-
-
-async def extract_last_updated_iso(page: Page) -> Optional[str]:
-	# По требованию: сначала берём дату из "Last Updated - X months ago";
-	# если нет, используем "Published on, Y months ago". Абсолютные даты игнорируем.
-	html = await page.content()
-	# Сначала Last Updated
-	m = re.search(r"last\s*updated[^\d]*(\d+)\s+month", html.lower())
-	if m:
-		months = int(m.group(1))
-		dt = subtract_months(datetime.now(timezone.utc), months)
-		return to_iso_utc(dt)
-	# Затем Published on
-	m = re.search(r"published\s*on[^\d]*(\d+)\s+month", html.lower())
-	if m:
-		months = int(m.group(1))
-		dt = subtract_months(datetime.now(timezone.utc), months)
-		return to_iso_utc(dt)
-	return None
 
-
-async def extract_download_link(page: Page) -> Optional[str]:
     # Step 1: Click the main "Download" button to open the modal
     try:
         download_button = page.locator('button:has-text("Download")')
         if await download_button.count() > 0:
             await download_button.first.click()
-            await page.wait_for_timeout(500)
+            # Wait for the modal's token generation button instead of sleeping
+            await generate_button.first.wait_for(state="visible", timeout=3000)
     except Exception:
         pass
 
     # Step 2: Click the token generation button inside the modal
     try:
-        generate_button = page.locator('a.download-button:has-text("Download")')
         if await generate_button.count() == 0:
             # Fallback: any button/anchor with Download text inside a dialog
             generate_button = page.locator('a:has-text("Download")')
         if await generate_button.count() > 0:
             await generate_button.first.click()
-            # Allow async token creation
-            await page.wait_for_timeout(1500)
     except Exception:
         pass
 
-    # Step 3: Wait for the final anchor with "Download Now"
+    # Step 3: Wait for the final anchor with "Download Now" (covers async token creation)
     try:
-        final_anchor = page.locator('a:has-text("Download Now")')
         await final_anchor.first.wait_for(state="visible", timeout=15000)
-        href = await final_anchor.first.get_attribute("href")
-        if href:
-            # Normalize whitespace/newlines
-            href = re.sub(r"\s+", "", href)
-            return href
+        return await read_download_href(final_anchor)
     except Exception:
         pass
     return None
 
 
-async def scrape_game(context, game_url: str) -> Optional[DownloadItem]:
+async def new_game_page(context: BrowserContext) -> Page:
     page = await context.new_page()
+    # Stray locator waits fail fast instead of the default 30s
+    page.set_default_timeout(10000)
+    page.set_default_navigation_timeout(20000)
+    return page
+
+
+async def close_page(page: Optional[Page]) -> None:
+    # A crashed page may fail to close; that must not take the worker down
+    if page is None:
+        return
     try:
-        await page.goto(game_url, wait_until="domcontentloaded")
-        # Ensure large viewport so lg: elements are visible
-        await page.set_viewport_size({"width": 1366, "height": 900})
-
-        title = await extract_title(page)
-        upload_iso = await extract_last_updated_iso(page)
-        file_size = await extract_file_size(page)
-        download_uri = await extract_download_link(page)
-
-        if not title:
-            title = ""
-        if not upload_iso:
-            upload_iso = ""
-        if not file_size:
-            file_size = ""
-        uris = [download_uri] if download_uri else []
-
-        return DownloadItem(
-            title=title,
-            uris=uris,
-            uploadDate=upload_iso,
-            fileSize=file_size,
-            repackLinkSource=game_url,
-        )
-    finally:
         await page.close()
+    except Exception:
+        pass
 
 
-async def main(limit: Optional[int] = None, output_path: str = "ankergames.json"):
-    async with async_playwright() as p:
-        browser: Browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context(user_agent=(
+async def reopen_game_page(context: BrowserContext, page: Optional[Page]) -> Optional[Page]:
+    # Replace a hung or crashed page; None if the context cannot open a new one
+    await close_page(page)
+    try:
+        return await new_game_page(context)
+    except Exception as e:
+        print(f"Failed to open a new page: {e}")
+        return None
+
+
+async def scrape_game(page: Page, game_url: str, now: Optional[datetime] = None) -> Optional[DownloadItem]:
+    # The page is reused between games: navigation replaces the previous document
+    # Size, "Last updated" and Edition follow the h1, so the whole document must be parsed
+    await page.goto(game_url, wait_until="domcontentloaded")
+
+    info = await extract_page_info(page)
+    title = build_title(info)
+    # По требованию: сначала "Last Updated - X months ago", затем "Published on, Y months ago"
+    upload_iso = parse_relative_months(info.get("dateText") or "", now)
+    file_size = info.get("fileSize")
+    download_uri = await extract_download_link(page)
+
+    if not title:
+        title = ""
+    if not upload_iso:
+        upload_iso = ""
+    if not file_size:
+        file_size = ""
+    uris = [download_uri] if download_uri else []
+
+    return DownloadItem(
+        title=title,
+        uris=uris,
+        uploadDate=upload_iso,
+        fileSize=file_size,
+        repackLinkSource=game_url,
+    )
+
+
+async def new_scrape_context(browser: Browser) -> BrowserContext:
+    context = await browser.new_context(
+        user_agent=(
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
             "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
-        ))
+        ),
+        # Large viewport so lg: elements are visible on every page from the start
+        viewport={"width": 1366, "height": 900},
+    )
+    await context.route("**/*", block_resources)
+    return context
+
+
+async def main(
+    limit: Optional[int] = None,
+    output_path: str = "ankergames.json",
+    concurrency: int = 8,
+    contexts: Optional[int] = None,
+):
+    async with async_playwright() as p:
+        browser: Browser = await p.chromium.launch(headless=True)
+        context = await new_scrape_context(browser)
         page = await context.new_page()
 
         try:
             links = await get_game_links(page)
         finally:
             await page.close()
+            await context.close()
 
         if limit is not None:
             links = links[:limit]
 
-        results: List[DownloadItem] = []
+        # Все относительные даты за один запуск считаются от одного и того же момента
+        now = datetime.now(timezone.utc)
+
+        # Игры раздаются из общей очереди воркерам в нескольких контекстах (у каждого
+        # контекста свой процесс рендеринга); у каждого воркера одна постоянная страница.
+        # concurrency - общее число страниц, оно делится между контекстами
+        concurrency = max(1, concurrency)
+        if contexts is None:
+            contexts = min((os.cpu_count() or 2) // 2, 4)
+        contexts = max(1, min(contexts, len(links), concurrency))
+        pages_per_context = [
+            concurrency // contexts + (1 if i < concurrency % contexts else 0)
+            for i in range(contexts)
+        ]
+        queue: asyncio.Queue = asyncio.Queue()
         for idx, url in enumerate(links, start=1):
-            print(f"[{idx}/{len(links)}] {url}")
-            try:
-                item = await scrape_game(context, url)
-                if item:
-                    results.append(item)
-            except Exception as e:
-                print(f"Failed to scrape {url}: {e}")
-
-        await context.close()
-        await browser.close()
-
-        data = {
-            "name": "AnkerGames",
-            "downloads": [
-                {
-                    "title": r.title,
-                    "uris": r.uris,
-                    "uploadDate": r.uploadDate,
-                    "fileSize": r.fileSize,
-                    "repackLinkSource": r.repackLinkSource,
-                }
-                for r in results
-            ],
-        }
+            queue.put_nowait((idx, url))
+        written = 0
 
+        # Результаты пишутся в файл по мере готовности: память не растёт с числом игр,
+        # а при сбое уже собранные записи остаются на диске
         with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        print(f"Saved to {output_path}")
+            f.write('{"name":"AnkerGames","downloads":[\n')
+
+            async def _worker(context: BrowserContext) -> None:
+                nonlocal written
+                page = await reopen_game_page(context, None)
+                try:
+                    # Без страницы воркер завершается, оставшиеся игры разберут другие воркеры
+                    while page is not None and not queue.empty():
+                        idx, url = queue.get_nowait()
+                        print(f"[{idx}/{len(links)}] {url}")
+                        item = None
+                        for attempt in range(GAME_RETRIES + 1):
+                            try:
+                                item = await asyncio.wait_for(scrape_game(page, url, now), timeout=GAME_TIMEOUT_S)
+                                break
+                            except (asyncio.TimeoutError, PlaywrightTimeoutError) as e:
+                                # Зависшую страницу не переиспользуем; обычно первым срабатывает
+                                # таймаут самого Playwright (навигация, ожидание элементов), а не общий лимит
+                                page = await reopen_game_page(context, page)
+                                if page is not None and attempt < GAME_RETRIES:
+                                    print(f"Timeout on {url}, retrying")
+                                    await asyncio.sleep(2 ** attempt)
+                                    continue
+                                print(f"Failed to scrape {url}: {str(e) or f'timed out after {GAME_TIMEOUT_S}s'}")
+                                break
+                            except Exception as e:
+                                print(f"Failed to scrape {url}: {e}")
+                                # Упавшую страницу заменяем, чтобы не терять на ней следующие игры
+                                if page.is_closed():
+                                    page = await reopen_game_page(context, page)
+                                break
+                        if item:
+                            # Запись синхронная, без await, поэтому строки разных задач не перемешиваются
+                            f.write((",\n" if written else "") + dump_item(item))
+                            written += 1
+                finally:
+                    await close_page(page)
+
+            async def _shard(pages: int) -> None:
+                # Сбой одного контекста не должен прерывать запуск: файл закрылся бы под остальными воркерами
+                try:
+                    context = await new_scrape_context(browser)
+                except Exception as e:
+                    print(f"Failed to open a browser context: {e}")
+                    return
+                try:
+                    await asyncio.gather(*[_worker(context) for _ in range(pages)])
+                finally:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+
+            await asyncio.gather(*[_shard(pages) for pages in pages_per_context])
+            f.write("\n]}\n")
+
+        await browser.close()
+        print(f"Saved {written} games to {output_path}")
 
 
 if __name__ == "__main__":
@@ -357,9 +483,16 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="AnkerGames parser")
     parser.add_argument("--limit", type=int, default=None, help="Ограничить количество игр для парсинга")
     parser.add_argument("--output", type=str, default="ankergames.json", help="Путь к выходному JSON")
+    parser.add_argument("--concurrency", type=int, default=8, help="Общее количество страниц, обрабатываемых одновременно (делится между контекстами)")
+    parser.add_argument("--contexts", type=int, default=None, help="Количество контекстов браузера (по умолчанию по числу ядер, не больше 4)")
     args = parser.parse_args()
 
-    asyncio.run(main(limit=args.limit, output_path=args.output))
+    asyncio.run(main(
+        limit=args.limit,
+        output_path=args.output,
+        concurrency=args.concurrency,
+        contexts=args.contexts,
+    ))
 
 
 
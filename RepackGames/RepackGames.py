@@ -1,19 +1,177 @@
 import asyncio
 import aiohttp
-import aiofiles
-from bs4 import BeautifulSoup
+import itertools
+import lxml.etree
+import lxml.html
 import json
+import os
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from urllib.parse import urljoin, urlparse
 
+try:
+    import orjson
+except ImportError:
+    # Fallback на стандартный json, если orjson не установлен
+    orjson = None
+
+
+# Регулярные выражения компилируются один раз при импорте модуля
+_SIZE_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'Game size:\s*([0-9.]+\s*[KMGT]B\+?)',
+    r'Size:\s*([0-9.]+\s*[KMGT]B\+?)',
+    r'([0-9.]+\s*[KMGT]B\+?)',  # Простой поиск размера
+)]
+_SIZE_CLEAN_RE = re.compile(r'[^0-9.KMGTB+ ]')
+
+# Даты в game-info: сначала дата с меткой UPDATED / PUBLISHED (On -, :, пробел), затем любая дата
+_DATE_PATTERNS = (
+    re.compile(r'(?:UPDATED|PUBLISHED)(?:\s+O[nm]\s*-\s*|\s*:\s*|\s+)(\d{1,2}[-/]\d{1,2}[-/]\d{4})', re.IGNORECASE),
+    re.compile(r'(\d{1,2}[-/]\d{1,2}[-/]\d{4})'),
+)
+
+# Относительное время ("3 days ago") одним выражением для всех единиц
+_REL_TIME_RE = re.compile(r'(\d+)\s+(year|month|week|day|hour|minute|second)s?\s+ago', re.IGNORECASE)
+_REL_TIME_UNITS = {
+    'year': timedelta(days=365),
+    'month': timedelta(days=30),
+    'week': timedelta(weeks=1),
+    'day': timedelta(days=1),
+    'hour': timedelta(hours=1),
+    'minute': timedelta(minutes=1),
+    'second': timedelta(seconds=1),
+}
+
+_PAGES_RE = re.compile(r'Page \d+ of (\d+)')
+
+# Парсер lxml нельзя делить между потоками, поэтому у каждого потока пула свой,
+# переиспользуемый между страницами
+_tls = threading.local()
+
+
+def _get_parser():
+    parser = getattr(_tls, 'parser', None)
+    if parser is None:
+        # Страницы сайта в UTF-8; без явной кодировки libxml2 читает байты без <meta charset> как latin-1
+        parser = lxml.html.HTMLParser(encoding='utf-8', remove_comments=True, remove_blank_text=True, collect_ids=False)
+        _tls.parser = parser
+    return parser
+
+
+def _in_torrent_context(button, torrent_blocks):
+    """Метка TORRENT есть в блоке кнопки или в одном из ближайших предыдущих блоков.
+
+    torrent_blocks - общий для страницы кэш флага по блокам: соседние кнопки делят одни
+    и те же блоки, и текст каждого блока читается один раз
+    """
+    block = button.getparent()
+    if block is None:
+        return False
+    siblings = block.itersiblings(lxml.etree.Element, preceding=True)
+    for element in itertools.chain((block,), itertools.islice(siblings, _TORRENT_CONTEXT_SIBLINGS)):
+        has_torrent = torrent_blocks.get(element)
+        if has_torrent is None:
+            has_torrent = torrent_blocks[element] = 'TORRENT' in element.text_content().upper()
+        if has_torrent:
+            return True
+    return False
+
+
+def _has_class(name):
+    """XPath-условие: у элемента есть CSS-класс name (аналог class_= в BeautifulSoup)"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# XPath-выражения компилируются один раз при импорте модуля
+_WRAP_CONTENT = f"(//div[{_has_class('wrap-content')}])[1]"
+_ERROR_404_XPATH = lxml.etree.XPath(f"{_WRAP_CONTENT}//div[{_has_class('article-btn')}]")
+_TITLE_XPATH = lxml.etree.XPath(f"//h1[{_has_class('article-title')} and {_has_class('entry-title')}]")
+# Текст блока game-info целиком строкой (string() в C, без обхода элементов в Python);
+# пустая строка, если блока нет
+_GAME_INFO_TEXT_XPATH = lxml.etree.XPath(
+    f"string((//div[{_has_class('game-info')}])[1])",
+    smart_strings=False,
+)
+_TIME_ARTICLE_XPATH = lxml.etree.XPath(f"//div[{_has_class('time-article')} and {_has_class('updated')}]")
+# Кнопки скачивания ('gp-download-buttons' / 'enjoy-css') одним списком в порядке появления на странице
+_DOWNLOAD_BUTTONS_XPATH = lxml.etree.XPath(
+    f"//a[{_has_class('gp-download-buttons')} or {_has_class('enjoy-css')}]"
+)
+# Сколько предыдущих соседних блоков просматривается в поисках метки TORRENT
+_TORRENT_CONTEXT_SIBLINGS = 4
+_PAGES_XPATH = lxml.etree.XPath(f"(//div[{_has_class('wp-pagenavi')}])[1]//span[{_has_class('pages')}]")
+
+# Ссылка ведёт на страницу игры, а не на категорию или автора (проверяется прямо в XPath)
+_GAME_HREF = (
+    "starts-with(@href, 'https://repack-games.com/')"
+    " and not(contains(@href, '/category/')) and not(contains(@href, '/author/'))"
+)
+
+# Ссылки на игры в категории: ссылка из заголовка каждой статьи в articles-content,
+# запасной вариант - первая ссылка каждого пункта modern-articles, последний - первая
+# ссылка на игру (без параметров ?p=) в каждой статье
+_ARTICLE_LINKS_XPATH = lxml.etree.XPath(
+    f"({_WRAP_CONTENT}//div[{_has_class('articles-content')}])[1]"
+    f"//article[{_has_class('article')}]/descendant::h2[{_has_class('article-title')}][1]"
+    f"/descendant::a[@href][1][{_GAME_HREF}]/@href",
+    smart_strings=False,
+)
+_MODERN_ARTICLE_LINKS_XPATH = lxml.etree.XPath(
+    f"({_WRAP_CONTENT}//ul[{_has_class('modern-articles')}])[1]//li/descendant::a[@href][1][{_GAME_HREF}]/@href",
+    smart_strings=False,
+)
+_ANY_ARTICLE_LINKS_XPATH = lxml.etree.XPath(
+    f"{_WRAP_CONTENT}//article/descendant::a[{_GAME_HREF} and not(contains(@href, '/?p='))][1]/@href",
+    smart_strings=False,
+)
+
+
+class TokenBucket:
+    """Асинхронный token bucket: в среднем не больше rate запросов в секунду, пачка до capacity"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        # Меньше одного токена в ведре не накопится никогда: при rate < 1 acquire() ждал бы вечно
+        self.capacity = max(1, capacity or rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
 
 class RepackGamesParser:
-    def __init__(self, max_concurrent=160):
+    def __init__(self, max_concurrent=160, requests_per_second=None, game_workers=256, queue_size=5000, parse_threads=None):
         self.base_url = "https://repack-games.com"
         self.max_concurrent = max_concurrent
-        self.semaphore = asyncio.Semaphore(max_concurrent)
+        # Разбор HTML идет в пуле потоков, чтобы не блокировать event loop (lxml отпускает GIL)
+        self.parse_threads = parse_threads or os.cpu_count() or 4
+        # Страницы игр разбирает фиксированный пул воркеров из общей ограниченной очереди
+        self.game_workers = game_workers
+        self.queue_size = queue_size
+        self._game_queue = None
+        # Одна и та же игра часто встречается в нескольких категориях - парсим ее один раз
+        self._seen_urls = set()
+        # Допуск запросов: лимит одновременных запросов (_cmax) уменьшается вдвое при 429/5xx
+        # и снова растет на 1 с каждым успешным ответом, но не выше max_concurrent
+        self._admit_cv = asyncio.Condition()
+        self._active = 0
+        self._cmax = max_concurrent
+        self._last_throttle = 0.0
+        # Ограничение частоты запросов (None - без ограничения, только лимит одновременных)
+        self.rate_limiter = TokenBucket(requests_per_second) if requests_per_second else None
         
         # Категории игр из инструкций
         self.categories = {
@@ -44,79 +202,105 @@ class RepackGamesParser:
         self.games_data = []
         self.total_games_parsed = 0
         self.start_time = None
+        # Момент начала парсинга: от него считается относительное время ("3 days ago")
+        self._now = None
+
+    def _tree(self, html_content):
+        """Разбирает HTML в дерево lxml; для пустой страницы возвращает None"""
+        if not html_content:
+            return None
+        try:
+            return lxml.html.fromstring(html_content, parser=_get_parser())
+        except (lxml.etree.ParserError, ValueError):
+            return None
+
+    async def _acquire_slot(self):
+        """Ждет, пока число активных запросов станет меньше текущего лимита"""
+        async with self._admit_cv:
+            await self._admit_cv.wait_for(lambda: self._active < self._cmax)
+            self._active += 1
+
+    async def _release_slot(self):
+        async with self._admit_cv:
+            self._active -= 1
+            self._admit_cv.notify(1)
+
+    async def _adjust_limit(self, throttled):
+        """Подстраивает лимит одновременных запросов под ответы сайта"""
+        async with self._admit_cv:
+            if throttled:
+                # Пачка 429/5xx уменьшает лимит не чаще раза в секунду
+                now = time.monotonic()
+                if now - self._last_throttle >= 1.0:
+                    self._last_throttle = now
+                    self._cmax = max(1, self._cmax // 2)
+            elif self._cmax < self.max_concurrent:
+                self._cmax += 1
+                self._admit_cv.notify(1)
 
     async def get_page_content(self, session, url):
         """Получает содержимое страницы с повторными попытками (еще быстрее)"""
-        async with self.semaphore:
+        await self._acquire_slot()
+        try:
             for attempt in range(3):
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire()
                 try:
-                    # Очень маленькая пауза, чтобы избежать пачек
-                    await asyncio.sleep(0.01)
                     async with session.get(url, timeout=aiohttp.ClientTimeout(total=12)) as response:
+                        await self._adjust_limit(response.status == 429 or response.status >= 500)
                         response.raise_for_status()
-                        return await response.text()
+                        # Сырые байты: lxml сам декодирует их в C, без промежуточной str
+                        return await response.read()
                 except Exception as e:
                     if attempt < 2:
-                        await asyncio.sleep(0.15)
+                        # Экспоненциальная пауза только после ошибки
+                        await asyncio.sleep(0.15 * 2 ** attempt)
                         continue
                     return None
+        finally:
+            await self._release_slot()
 
     def is_404_page(self, html_content):
         """Проверяет, является ли страница 404 ошибкой"""
         if not html_content:
             return True
-        soup = BeautifulSoup(html_content, 'html.parser')
-        wrap_content = soup.find('div', class_='wrap-content')
-        if wrap_content:
-            article_btn = wrap_content.find('div', class_='article-btn')
-            if article_btn and "Error 404" in article_btn.get_text():
-                return True
-        return False
+        # Быстрая проверка по байтам: без маркера страница точно не 404 и разбирать ее не нужно
+        if b'Error 404' not in html_content:
+            return False
+        # Маркер может встретиться и в тексте обычной страницы - подтверждаем по блоку article-btn
+        tree = self._tree(html_content)
+        if tree is None:
+            return True
+        article_btn = _ERROR_404_XPATH(tree)
+        return bool(article_btn) and "Error 404" in article_btn[0].text_content()
 
-    def parse_file_size(self, game_info):
-        """Улучшенный парсинг размера файла"""
-        if not game_info:
+    def parse_file_size(self, info_text):
+        """Улучшенный парсинг размера файла по тексту блока game-info"""
+        if not info_text:
             return "Unknown"
         
-        info_text = game_info.get_text()
-        
         # Различные варианты поиска размера
-        size_patterns = [
-            r'Game size:\s*([0-9.]+\s*[KMGT]B\+?)',
-            r'Size:\s*([0-9.]+\s*[KMGT]B\+?)', 
-            r'([0-9.]+\s*[KMGT]B\+?)',  # Простой поиск размера
-        ]
-        
-        for pattern in size_patterns:
-            match = re.search(pattern, info_text, re.IGNORECASE)
+        for pattern in _SIZE_PATTERNS:
+            match = pattern.search(info_text)
             if match:
                 size = match.group(1).strip()
                 # Очищаем от возможного мусора
-                size = re.sub(r'[^0-9.KMGTB+ ]', '', size).strip()
+                size = _SIZE_CLEAN_RE.sub('', size).strip()
                 if size:
                     return size
         
         return "Unknown"
 
-    def parse_date_info(self, soup):
+    def parse_date_info(self, tree, info_text=None):
         """Улучшенный парсинг даты с множественными источниками"""
         upload_date = None
         
-        # Сначала ищем в game-info
-        game_info = soup.find('div', class_='game-info')
-        if game_info:
-            info_text = game_info.get_text()
-            
-            # Различные форматы дат в game-info (UPDATED / PUBLISHED)
-            date_patterns = [
-                r'(?:UPDATED|PUBLISHED)\s+O[nm]\s*-\s*(\d{1,2}[-/]\d{1,2}[-/]\d{4})',
-                r'(?:UPDATED|PUBLISHED)\s*:\s*(\d{1,2}[-/]\d{1,2}[-/]\d{4})',
-                r'(?:UPDATED|PUBLISHED)\s+(\d{1,2}[-/]\d{1,2}[-/]\d{4})',
-                r'(\d{1,2}[-/]\d{1,2}[-/]\d{4})',
-            ]
-            
-            for pattern in date_patterns:
-                match = re.search(pattern, info_text, re.IGNORECASE)
+        # Сначала ищем в game-info (текст блока можно передать уже извлеченным)
+        if info_text is None:
+            info_text = _GAME_INFO_TEXT_XPATH(tree)
+        if info_text:
+            for pattern in _DATE_PATTERNS:
+                match = pattern.search(info_text)
                 if match:
                     date_str = match.group(1)
                     # Пробуем разные форматы дат
@@ -142,206 +326,162 @@ class RepackGamesParser:
         
         # Если дата не найдена в game-info, ищем в time-article
         if not upload_date:
-            time_article = soup.find('div', class_='time-article updated')
+            time_article = _TIME_ARTICLE_XPATH(tree)
             if time_article:
-                time_text = time_article.get_text().strip()
+                time_text = time_article[0].text_content().strip()
                 
                 # Парсим относительное время
-                relative_patterns = [
-                    r'(\d+)\s+(year|years)\s+ago',
-                    r'(\d+)\s+(month|months)\s+ago', 
-                    r'(\d+)\s+(week|weeks)\s+ago',
-                    r'(\d+)\s+(day|days)\s+ago',
-                    r'(\d+)\s+(hour|hours)\s+ago',
-                    r'(\d+)\s+(minute|minutes)\s+ago',
-                    r'(\d+)\s+(second|seconds)\s+ago',
-                ]
-                
-                for pattern in relative_patterns:
-                    match = re.search(pattern, time_text, re.IGNORECASE)
-                    if match:
-                        value = int(match.group(1))
-                        unit = match.group(2).lower()
-                        
-                        now = datetime.now()
-                        
-                        if 'year' in unit:
-                            calculated_date = now - timedelta(days=value * 365)
-                        elif 'month' in unit:
-                            calculated_date = now - timedelta(days=value * 30)
-                        elif 'week' in unit:
-                            calculated_date = now - timedelta(weeks=value)
-                        elif 'day' in unit:
-                            calculated_date = now - timedelta(days=value)
-                        elif 'hour' in unit:
-                            calculated_date = now - timedelta(hours=value)
-                        elif 'minute' in unit:
-                            calculated_date = now - timedelta(minutes=value)
-                        elif 'second' in unit:
-                            calculated_date = now - timedelta(seconds=value)
-                        else:
-                            continue
-                        
-                        upload_date = calculated_date.isoformat() + ".000Z"
-                        break
+                match = _REL_TIME_RE.search(time_text)
+                if match:
+                    value = int(match.group(1))
+                    unit = match.group(2).lower()
+                    now = self._now or datetime.now()
+                    calculated_date = now - value * _REL_TIME_UNITS[unit]
+                    upload_date = calculated_date.isoformat() + ".000Z"
         
         return upload_date
 
+    def _parse_game_page(self, html_content, game_url):
+        """Синхронно разбирает страницу игры (выполняется в пуле потоков)"""
+        tree = self._tree(html_content)
+        if tree is None:
+            return None
+        
+        # Извлечение названия
+        title_tag = _TITLE_XPATH(tree)
+        title = title_tag[0].text_content().strip() if title_tag else "Unknown Title"
+        
+        # Текст game-info извлекается один раз для размера и даты
+        info_text = _GAME_INFO_TEXT_XPATH(tree)
+        
+        # Улучшенный парсинг размера файла
+        file_size = self.parse_file_size(info_text)
+        
+        # Улучшенный парсинг даты
+        upload_date = self.parse_date_info(tree, info_text)
+        
+        # Извлечение ссылок на скачивание
+        download_links = self.extract_download_links(tree)
+        
+        # Проверяем что получили ссылки на скачивание
+        if not download_links:
+            return None
+        
+        return {
+            "title": title,
+            "uris": download_links,
+            "fileSize": file_size,
+            "uploadDate": upload_date,
+            "repackLinkSource": game_url
+        }
+
     async def parse_game_info(self, session, game_url):
         """Парсит информацию об игре со страницы игры асинхронно"""
         try:
             html_content = await self.get_page_content(session, game_url)
-            if not html_content:
-                return None
-                
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Извлечение названия
-            title_tag = soup.find('h1', class_='article-title entry-title')
-            title = title_tag.get_text().strip() if title_tag else "Unknown Title"
-            
-            # Улучшенный парсинг размера файла
-            game_info = soup.find('div', class_='game-info')
-            file_size = self.parse_file_size(game_info)
-            
-            # Улучшенный парсинг даты
-            upload_date = self.parse_date_info(soup)
-            
-            # Извлечение ссылок на скачивание
-            download_links = self.extract_download_links(soup)
-            
-            # Проверяем что получили ссылки на скачивание
-            if not download_links:
-                return None
+            game_data = await asyncio.to_thread(self._parse_game_page, html_content, game_url)
             
             # Увеличиваем счетчик (без вывода, чтобы не мешать rich progress)
-            self.total_games_parsed += 1
+            if game_data:
+                self.total_games_parsed += 1
             
-            return {
-                "title": title,
-                "uris": download_links,
-                "fileSize": file_size,
-                "uploadDate": upload_date,
-                "repackLinkSource": game_url
-            }
+            return game_data
         except Exception as e:
             print(f"❌ Ошибка парсинга игры {game_url}: {e}")
             return None
 
-    def extract_download_links(self, soup):
+    def extract_download_links(self, tree):
         """Извлекает ссылки на скачивание, исключая первую ссылку под секцией TORRENT."""
         download_links = []
+        seen = set()
 
-        # Собираем ссылки как с классом 'gp-download-buttons', так и 'enjoy-css'
-        buttons_gp = soup.find_all('a', class_='gp-download-buttons')
-        buttons_enjoy = soup.find_all('a', class_='enjoy-css')
-
-        # Склеиваем списки в порядке появления на странице (BeautifulSoup сохраняет порядок в find_all)
-        download_buttons = buttons_gp + buttons_enjoy
-
-        is_torrent_section = False
-
-        for button in download_buttons:
-            # Определяем контекст (ищем метку TORRENT в текущем блоке и ближайших соседях)
-            prev_texts = []
-            current = button.parent
-
-            for _ in range(5):
-                if current is None:
-                    break
-                try:
-                    prev_texts.append(current.get_text(strip=True).upper())
-                except Exception:
-                    pass
-                current = current.find_previous_sibling()
-
-            context_text = " ".join(prev_texts)
+        # Секция TORRENT - подряд идущие кнопки, у которых метка TORRENT есть в их блоке
+        # или в ближайших предыдущих блоках
+        in_torrent_section = False
+        torrent_blocks = {}
 
+        for button in _DOWNLOAD_BUTTONS_XPATH(tree):
+            torrent_context = _in_torrent_context(button, torrent_blocks)
             # Пропускаем первую ссылку под секцией TORRENT, последующие берем
-            if 'TORRENT' in context_text:
-                if not is_torrent_section:
-                    is_torrent_section = True
-                    continue
-                else:
-                    is_torrent_section = False
-            else:
-                is_torrent_section = False
+            if torrent_context and not in_torrent_section:
+                in_torrent_section = True
+                continue
+            in_torrent_section = torrent_context
 
             href = button.get('href')
-            if href and href not in download_links:
+            if href and href not in seen:
+                seen.add(href)
                 download_links.append(href)
 
         return download_links
 
-    def extract_game_links_from_category(self, soup):
+    def extract_game_links_from_category(self, tree):
         """Извлекает ссылки на игры из категории - КАК В 1.PY"""
-        game_links = []
-        
-        # Ищем блок с контентом
-        wrap_content = soup.find('div', class_='wrap-content')
-        if not wrap_content:
-            return game_links
-        
-        # Правильный способ: ищем все статьи в блоке articles-content
-        articles_content = wrap_content.find('div', class_='articles-content')
-        if articles_content:
-            # Ищем все статьи
-            articles = articles_content.find_all('article', class_='article')
-            for article in articles:
-                # Ищем заголовок с ссылкой
-                title_element = article.find('h2', class_='article-title')
-                if title_element:
-                    link_element = title_element.find('a', href=True)
-                    if link_element:
-                        href = link_element['href']
-                        if href.startswith('https://repack-games.com/') and '/category/' not in href and '/author/' not in href:
-                            game_links.append(href)
+        # Правильный способ: ссылки из заголовков статей в блоке articles-content
+        game_links = _ARTICLE_LINKS_XPATH(tree)
         
         # Альтернативный способ поиска, если основной не сработал
         if not game_links:
-            # Ищем все ссылки в контейнере modern-articles
-            modern_articles = wrap_content.find('ul', class_='modern-articles')
-            if modern_articles:
-                articles = modern_articles.find_all('li')
-                for article in articles:
-                    link_tag = article.find('a', href=True)
-                    if link_tag:
-                        href = link_tag['href']
-                        if href.startswith('https://repack-games.com/') and '/category/' not in href and '/author/' not in href:
-                            game_links.append(href)
+            game_links = _MODERN_ARTICLE_LINKS_XPATH(tree)
         
         # Третий способ - поиск во всех статьях без привязки к конкретному классу
         if not game_links:
-            all_articles = wrap_content.find_all('article')
-            for article in all_articles:
-                # Ищем любые ссылки на игры в статье
-                links = article.find_all('a', href=True)
-                for link in links:
-                    href = link['href']
-                    if (href.startswith('https://repack-games.com/') and 
-                        '/category/' not in href and 
-                        '/author/' not in href and
-                        '/?p=' not in href):  # Исключаем ссылки с параметрами
-                        game_links.append(href)
-                        break  # Берем только первую ссылку из каждой статьи
+            game_links = _ANY_ARTICLE_LINKS_XPATH(tree)
         
         return game_links
 
-    def get_total_pages_from_pagination(self, soup):
+    def get_total_pages_from_pagination(self, tree):
         """Извлекает общее количество страниц из элемента пагинации"""
-        wp_pagenavi = soup.find('div', class_='wp-pagenavi')
-        if wp_pagenavi:
-            pages_span = wp_pagenavi.find('span', class_='pages')
-            if pages_span:
-                text = pages_span.get_text()
-                # Ищем паттерн "Page X of Y"
-                match = re.search(r'Page \d+ of (\d+)', text)
-                if match:
-                    return int(match.group(1))
+        pages_span = _PAGES_XPATH(tree)
+        if pages_span:
+            text = pages_span[0].text_content()
+            # Ищем паттерн "Page X of Y"
+            match = _PAGES_RE.search(text)
+            if match:
+                return int(match.group(1))
         return None
 
-    async def parse_category_page_and_games(self, session, category_name, category_url, page):
-        """Парсит страницу категории и сразу парсит найденные игры"""
+    async def enqueue_games(self, games, game_links):
+        """Ставит новые игры в очередь воркеров; результаты попадут в список games категории"""
+        for game_url in game_links:
+            if game_url in self._seen_urls:
+                continue
+            self._seen_urls.add(game_url)
+            await self._game_queue.put((games, game_url))
+
+    async def game_worker(self, session):
+        """Воркер: берет игры из общей очереди и парсит их"""
+        while True:
+            games, game_url = await self._game_queue.get()
+            try:
+                result = await self.parse_game_info(session, game_url)
+                if result:
+                    games.append(result)
+            finally:
+                self._game_queue.task_done()
+
+    def _parse_category_page(self, html_content):
+        """Синхронно разбирает страницу категории (в пуле потоков); None - страницы нет"""
+        if self.is_404_page(html_content):
+            return None
+        
+        tree = self._tree(html_content)
+        if tree is None:
+            return None
+        
+        # Используем ИСПРАВЛЕННЫЙ метод поиска игр
+        return self.extract_game_links_from_category(tree)
+
+    def _parse_category_first_page(self, html_content):
+        """Синхронно разбирает первую страницу категории (в пуле потоков): (число страниц, ссылки) или None"""
+        tree = self._tree(html_content)
+        if tree is None:
+            return None
+        
+        return self.get_total_pages_from_pagination(tree), self.extract_game_links_from_category(tree)
+
+    async def parse_category_page_and_games(self, session, category_name, category_url, page, games):
+        """Парсит страницу категории и ставит найденные игры в очередь на парсинг"""
         
         if page == 1:
             url = category_url
@@ -349,32 +489,13 @@ class RepackGamesParser:
             url = f"{category_url}page/{page}/"
         
         html_content = await self.get_page_content(session, url)
-        
-        if self.is_404_page(html_content):
-            return []
-            
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Используем ИСПРАВЛЕННЫЙ метод поиска игр
-        game_links = self.extract_game_links_from_category(soup)
-        
-        # без подробного спама в консоль
-        
-        if not game_links:
-            return []
-        
-        # Парсим все игры с этой страницы параллельно
-        tasks = [self.parse_game_info(session, game_url) for game_url in game_links]
-        game_results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Фильтруем успешные результаты
-        valid_games = []
-        for result in game_results:
-            if isinstance(result, dict) and result is not None:
-                valid_games.append(result)
+        game_links = await asyncio.to_thread(self._parse_category_page, html_content)
+        if game_links is None:
+            return 0
         
         # без подробного спама в консоль
-        return valid_games
+        await self.enqueue_games(games, game_links)
+        return len(game_links)
 
     async def parse_category_with_pagination(self, session, category_name, category_url, progress):
         """СКОРОСТЬ И ПОИСК ИГР ИЗ 1.PY + динамический прогресс"""
@@ -382,86 +503,79 @@ class RepackGamesParser:
         # Создаем задачу прогресса для этой категории
         task_id = progress.add_task(f"Processing category: {category_name}", total=None)
         
-        # Сначала определяем общее количество страниц
-        html_content = await self.get_page_content(session, category_url)
-        if not html_content:
-            progress.update(task_id, completed=True, description=f"[red]Failed category: {category_name}[/red]")
-            return []
-        
-        soup = BeautifulSoup(html_content, 'html.parser')
-        total_pages = self.get_total_pages_from_pagination(soup)
-        
-        if total_pages:
-            max_pages = total_pages
-        else:
-            max_pages = 999  # Fallback до 404
-        
-        # Настраиваем прогресс: общее количество страниц и начальный 0/total
-        completed_pages = 0
+        # Ошибка категории не прерывает остальные: отмечаем ее в прогрессе и возвращаем пустой список
         try:
-            progress.update(task_id, total=max_pages, description=f"Processing category: {category_name} (0/{max_pages})")
-        except Exception:
-            pass
+            # Сначала определяем общее количество страниц
+            html_content = await self.get_page_content(session, category_url)
+            first_page = await asyncio.to_thread(self._parse_category_first_page, html_content)
+            if first_page is None:
+                progress.update(task_id, completed=True, description=f"[red]Failed category: {category_name}[/red]")
+                return []
         
-        # Парсим первую страницу (уже загружена)
-        all_games = []
-        games_from_page = self.extract_game_links_from_category(soup)
+            total_pages, games_from_page = first_page
         
-        # без лишнего вывода
-        
-        if games_from_page:
-            # Парсим игры с первой страницы
-            tasks = [self.parse_game_info(session, game_url) for game_url in games_from_page]
-            game_results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            page_games = 0
-            for result in game_results:
-                if isinstance(result, dict) and result is not None:
-                    all_games.append(result)
-                    page_games += 1
-            # без лишнего вывода
-        
-        # Первая страница обработана (даже если игр 0)
-        completed_pages = 1
-        try:
-            progress.update(task_id, advance=1, description=f"Processing category: {category_name} ({completed_pages}/{max_pages})")
-        except Exception:
-            pass
-        
-        # Дальнейшее обновление будет в цикле страниц
-        
-        # Парсим остальные страницы ПАРАЛЛЕЛЬНО как в 1.py
-        if max_pages > 1:
-            remaining_pages = max_pages - 1
+            if total_pages:
+                max_pages = total_pages
+            else:
+                max_pages = 999  # Fallback до 404
+        
+            # Настраиваем прогресс: общее количество страниц и начальный 0/total
+            completed_pages = 0
+            try:
+                progress.update(task_id, total=max_pages, description=f"Processing category: {category_name} (0/{max_pages})")
+            except Exception:
+                pass
+        
+            # Игры с первой страницы (уже загружена) отправляем в очередь;
+            # список all_games заполняется воркерами по мере парсинга
+            all_games = []
+            await self.enqueue_games(all_games, games_from_page)
+        
+            # Первая страница обработана (даже если игр 0)
+            completed_pages = 1
+            try:
+                progress.update(task_id, advance=1, description=f"Processing category: {category_name} ({completed_pages}/{max_pages})")
+            except Exception:
+                pass
+        
+            # Дальнейшее обновление будет в цикле страниц
+        
+            # Парсим остальные страницы ПАРАЛЛЕЛЬНО как в 1.py
+            if max_pages > 1:
+                remaining_pages = max_pages - 1
             
-            # Создаем задачи для всех остальных страниц параллельно
-            page_tasks = []
-            for page in range(2, max_pages + 1):
-                page_tasks.append(
-                    self.parse_category_page_and_games(session, category_name, category_url, page)
-                )
+                # Создаем задачи для всех остальных страниц параллельно
+                page_tasks = []
+                for page in range(2, max_pages + 1):
+                    page_tasks.append(
+                        self.parse_category_page_and_games(session, category_name, category_url, page, all_games)
+                    )
             
-            # Выполняем все страницы параллельно с динамическим прогрессом
-            for coro in asyncio.as_completed(page_tasks):
-                try:
-                    result = await coro
-                    if isinstance(result, list):
-                        all_games.extend(result)
-                    completed_pages += 1
+                # Выполняем все страницы параллельно с динамическим прогрессом
+                for coro in asyncio.as_completed(page_tasks):
                     try:
-                        progress.update(task_id, advance=1, description=f"Processing category: {category_name} ({completed_pages}/{max_pages})")
+                        await coro
+                        completed_pages += 1
+                        try:
+                            progress.update(task_id, advance=1, description=f"Processing category: {category_name} ({completed_pages}/{max_pages})")
+                        except Exception:
+                            pass
                     except Exception:
-                        pass
-                except Exception:
-                    pass  # Игнорируем ошибки отдельных страниц
+                        pass  # Игнорируем ошибки отдельных страниц
         
-        # Завершаем, показывая финальный счетчик страниц
-        try:
-            progress.update(task_id, completed=True, description=f"Processing category: {category_name} ({completed_pages}/{max_pages})")
-        except Exception:
-            pass
+            # Завершаем, показывая финальный счетчик страниц
+            try:
+                progress.update(task_id, completed=True, description=f"Processing category: {category_name} ({completed_pages}/{max_pages})")
+            except Exception:
+                pass
         
-        return all_games
+            return all_games
+        except Exception as e:
+            try:
+                progress.update(task_id, completed=True, description=f"[red]Ошибка категории {category_name}: {e}[/red]")
+            except Exception:
+                pass
+            return []
 
     async def parse_all_categories(self):
         """Парсит все категории параллельно - визуал как в rutracker.py"""
@@ -490,14 +604,16 @@ class RepackGamesParser:
             console = type('obj', (object,), {'print': print})()
         
         self.start_time = time.time()
+        self._now = datetime.now()
         
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive',
         }
+        # Accept-Encoding не задаем: aiohttp сам объявляет gzip/deflate и br (если установлен
+        # Brotli из requirements.txt) и распаковывает ответ в C
         
         # Ускоряем, увеличивая лимиты подключений
         connector = aiohttp.TCPConnector(
@@ -519,22 +635,31 @@ class RepackGamesParser:
                 timeout=aiohttp.ClientTimeout(total=14)
             ) as session:
                 
+                # Общая ограниченная очередь игр и пул воркеров: число задач в памяти
+                # не зависит от размера сайта
+                self._game_queue = asyncio.Queue(maxsize=self.queue_size)
+                self._seen_urls = set()
+                asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=self.parse_threads))
+                workers = [asyncio.create_task(self.game_worker(session)) for _ in range(self.game_workers)]
+                
                 # Создаем задачи для всех категорий (каждая категория сама добавит одну строку прогресса)
                 tasks = [
                     self.parse_category_with_pagination(session, category_name, category_url, progress)
                     for category_name, category_url in self.categories.items()
                 ]
                 
-                # Выполняем ВСЕ категории одновременно
-                results = await asyncio.gather(*tasks, return_exceptions=True)
+                try:
+                    # Выполняем ВСЕ категории одновременно, затем ждем разбора всех игр из очереди
+                    results = await asyncio.gather(*tasks)
+                    await self._game_queue.join()
+                finally:
+                    for worker in workers:
+                        worker.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
                 
                 # Собираем все игры в общий список
-                for i, result in enumerate(results):
-                    if isinstance(result, list):
-                        self.games_data.extend(result)
-                    elif isinstance(result, Exception):
-                        category_name = list(self.categories.keys())[i]
-                        console.print(f"[red]Ошибка категории {category_name}: {result}[/red]")
+                for category_games in results:
+                    self.games_data.extend(category_games)
         
         elapsed_total = time.time() - self.start_time
         speed = len(self.games_data) / elapsed_total if elapsed_total > 0 else 0
@@ -546,15 +671,25 @@ class RepackGamesParser:
 Скорость: {speed:.1f} игр/сек
 """)
 
+    def _write_json(self, filename, data):
+        """Записывает JSON в файл (без отступов: файл читают другие скрипты)"""
+        if orjson is not None:
+            # orjson сразу отдает UTF-8 байты - пишем их без промежуточной строки
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(data))
+            return
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
     async def save_to_json(self, filename="repackgames.json"):
-        """Сохраняет данные в JSON файл асинхронно"""
+        """Сохраняет данные в JSON файл"""
         output_data = {
             "name": "Repack-Games",
             "downloads": self.games_data
         }
         
-        async with aiofiles.open(filename, 'w', encoding='utf-8') as f:
-            await f.write(json.dumps(output_data, ensure_ascii=False, indent=2))
+        # Одна запись в конце: синхронно в отдельном потоке, чтобы не блокировать event loop
+        await asyncio.to_thread(self._write_json, filename, output_data)
         
         print(f"Данные сохранены в файл: {filename}")
 
@@ -576,11 +711,26 @@ class RepackGamesParser:
                 print("Данные до ошибки сохранены")
 
 
-async def main():
+async def main(requests_per_second=None):
     # Ускоренные настройки
-    parser = RepackGamesParser(max_concurrent=160)
+    parser = RepackGamesParser(max_concurrent=160, requests_per_second=requests_per_second)
     await parser.run()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    import argparse
+    
+    arg_parser = argparse.ArgumentParser(description="Repack-Games parser")
+    arg_parser.add_argument("--rps", type=float, default=None, help="Ограничить число запросов в секунду (по умолчанию без ограничения)")
+    args = arg_parser.parse_args()
+    
+    # uvloop (libuv) ускоряет event loop; на Windows его нет - используем стандартный asyncio
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+    
+    if uvloop is not None:
+        uvloop.run(main(requests_per_second=args.rps))
+    else:
+        asyncio.run(main(requests_per_second=args.rps))
\ No newline at end of file